@@ -1,10 +1,24 @@
 import os
 import sys
+import io
 import re
+import argparse
+import json
+import tempfile
+import queue
+import threading
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import freeze_support
 from tkinter import Tk, Label, Entry, Button, filedialog, messagebox, W, E, S, N
-from tkinter.ttk import Separator
+from tkinter.ttk import Separator, Progressbar
 from PIL import Image
-import imagehash
+import img2pdf
+import numpy as np
+
+if sys.version_info < (3, 10):
+    raise SystemExit("本程序需要 Python 3.10 及以上版本（依赖 int.bit_count 与 X | None 类型注解）。")
 
 # --- 优化后的配置参数 ---
 # 1. 动画阈值：如果差异大于此值但小于换页阈值，认为是同一页 PPT 增加了新内容（如文字变多）
@@ -15,110 +29,510 @@ ANIMATION_THRESHOLD = 2
 # 此时我们会把上一页的“最终态”保存下来。
 NEW_SLIDE_THRESHOLD = 20 
 
+# 3. 可选的哈希算法及各自的 (动画阈值, 换页阈值)。上面两个阈值是针对 pHash 调好的；
+# aHash 只是 8x8 灰度图与均值比较，dHash 是相邻像素的梯度方向，二者都不需要 DCT。
+# 不过每帧的耗时几乎全在 JPEG 解码上（整批 DCT 只是两次小矩阵乘法），换用它们基本不省时间；
+# 而二者区分“动画叠加”与“换页”的能力都不如 pHash，因此默认仍使用 pHash。
+HASH_THRESHOLDS = {
+    'phash': (ANIMATION_THRESHOLD, NEW_SLIDE_THRESHOLD),
+    'ahash': (1, 6),
+    'dhash': (1, 8),    # 按带标注的样本校准：(2, 10) 会把约 1/4 的动画步骤误判为重复帧
+}
+DEFAULT_HASH_METHOD = 'phash'
+
+# 4. 并行哈希：每个子进程一次处理的图片数量。同一批图片堆叠成一个
+# (K, 高, 宽) 数组，一次完成整批的哈希计算（pHash 的 DCT 为两次矩阵乘法），摊薄 Python 调用开销。
+HASH_BATCH_SIZE = 64
+
+# 5. PDF 输出：页面尺寸按此 DPI 由像素尺寸换算。
+PDF_RESOLUTION = 100.0
+# 回退到 Pillow 写 PDF 时分段写入，每次只解码这么多页，写完即释放，内存占用与总页数无关。
+PDF_PAGES_PER_WRITE = 32
+
+# 6. 图片少于此数量时不启动进程池（Windows 下每个子进程都要重新导入 numpy，
+# 启动开销可达数秒），改为在本进程内用线程池并行处理各批图片。
+PROCESS_POOL_MIN_IMAGES = 256
+PREFETCH_WORKERS = 4
+PREFETCH_DEPTH = 8
+
+# 7. 哈希缓存：保存在输入文件夹中，按 (绝对路径, 文件大小, 修改时间) 复用已算过的哈希，
+# 调整阈值或换哈希算法后重新运行时无需再次解码图片。输入文件夹不可写时改存到系统临时目录。
+HASH_CACHE_FILENAME = ".ppt_hash_cache.json"
+# 修改解码或哈希计算方式（会改变哈希值）时递增，使旧缓存失效
+HASH_CACHE_VERSION = 5
+
+
+_DIGITS_RE = re.compile(r'(\d+)')
+
+
+def natural_sort_key(filename: str) -> tuple:
+    # 带捕获组的 split 结果中数字段总在奇数位置，按位置转换：整数与字符串永远不会互相比较，
+    # 也不会把 "²" 这类 isdigit() 为真、int() 却无法解析的字符误当成数字
+    parts = _DIGITS_RE.split(filename)
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
 
-def natural_sort_key(filename: str):
-    return [int(c) if c.isdigit() else c for c in re.split(r'(\d+)', filename)]
+
+# 文件名中含数字、扩展名为 jpg/jpeg/png（大小写不敏感）的图片才参与处理
+_IMAGE_NAME_RE = re.compile(r'\d.*\.(?:jpe?g|png)$', re.IGNORECASE)
+# 录屏工具导出的文件名通常就是纯序号，如 "12.jpg"
+_NUMBERED_NAME_RE = re.compile(r'\d+\.[a-z]+', re.IGNORECASE)
+
+
+def _numbered_sort_key(item: tuple[str, str]):
+    # 与 natural_sort_key 的顺序一致：先比序号，序号相同再比扩展名
+    number, _, ext = item[0].partition('.')
+    return int(number), ext
 
 
 def get_image_files(input_dir: str) -> list[str]:
-    all_files = []
-    for filename in os.listdir(input_dir):
-        if filename.lower().endswith(('.jpg', '.jpeg', '.png')) and re.search(r'\d+', filename):
-            full_path = os.path.join(input_dir, filename)
-            all_files.append((filename, full_path))
-    all_files.sort(key=lambda x: natural_sort_key(x[0]))
+    # scandir 的 DirEntry 自带文件类型信息，无需额外 stat
+    with os.scandir(input_dir) as entries:
+        all_files = [(entry.name, entry.path) for entry in entries
+                     if entry.is_file() and _IMAGE_NAME_RE.search(entry.name)]
+    if all(_NUMBERED_NAME_RE.fullmatch(name) for name, _ in all_files):
+        all_files.sort(key=_numbered_sort_key)
+    else:
+        all_files.sort(key=lambda x: natural_sort_key(x[0]))
     return [path for filename, path in all_files]
 
 
-def compute_perceptual_hash(image_path: str) -> imagehash.ImageHash | None:
+# 32 点 DCT-II 基矩阵的前 8 行：B @ X @ B.T 直接得到 pHash 所需的 8x8 低频块，
+# 不必计算完整的 32x32 DCT，整批图片只需两次矩阵乘法。
+# B[k, n] = 2cos(πk(2n+1)/64)，与 scipy.fft.dct（norm=None）的定义相同，无需依赖 scipy。
+_k, _n = np.arange(8)[:, None], np.arange(32)[None, :]
+_DCT_BASIS_8 = (2 * np.cos(np.pi * _k * (2 * _n + 1) / 64)).astype(np.float32)
+del _k, _n
+
+
+def _phash_bits(stack: np.ndarray) -> np.ndarray:
+    low = (_DCT_BASIS_8 @ stack @ _DCT_BASIS_8.T).reshape(len(stack), 64)
+    return low > np.median(low, axis=1, keepdims=True)
+
+
+def _ahash_bits(stack: np.ndarray) -> np.ndarray:
+    pixels = stack.reshape(len(stack), 64)
+    return pixels > pixels.mean(axis=1, keepdims=True)
+
+
+def _dhash_bits(stack: np.ndarray) -> np.ndarray:
+    return (stack[:, :, 1:] > stack[:, :, :-1]).reshape(len(stack), 64)
+
+
+# 算法名 -> (缩放尺寸 (宽, 高), 由 (K, 高, 宽) 灰度数组计算 (K, 64) 比特的函数)
+_HASH_FUNCTIONS = {
+    'phash': ((32, 32), _phash_bits),
+    'ahash': ((8, 8), _ahash_bits),
+    'dhash': ((9, 8), _dhash_bits),
+}
+
+
+def _read_file(path: str) -> bytes | None:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        print(f"警告：读取文件 {path} 时发生错误: {e}")
+        return None
+
+
+def _load_hash_pixels(data: bytes, image_path: str, method: str) -> np.ndarray | None:
+    size = _HASH_FUNCTIONS[method][0]
     try:
-        with Image.open(image_path) as img:
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            return imagehash.phash(img)
+        # 直接从内存中的字节解码，文件只读一次
+        with Image.open(io.BytesIO(data)) as img:
+            # 让 libjpeg 直接解码为灰度，并利用其 1/2、1/4、1/8 缩放 IDCT 只解出
+            # 不小于目标尺寸的小图，省去整幅 RGB 解码和一次颜色转换（PNG 上不生效）。
+            # 请求两倍目标尺寸，保证最后一步 BILINEAR 缩放至少有 2 倍的采样余量。
+            drafted = img.draft('L', (size[0] * 2, size[1] * 2))
+            if img.mode != 'L':
+                # draft 生效后 JPEG 已是灰度，convert 只会多复制一次
+                img = img.convert('L')
+            if drafted is None:
+                # PNG 等不支持 draft 的格式：先用整数倍的 reduce()（盒式滤波，开销很小）
+                # 缩到不小于两倍目标尺寸，再做 BILINEAR。JPEG 不走这里，哈希与 draft 时一致
+                factor = min(img.size[0] // (size[0] * 2), img.size[1] // (size[1] * 2))
+                if factor > 1:
+                    img = img.reduce(factor)
+            img = img.resize(size, Image.BILINEAR)
+            return np.asarray(img, dtype=np.float32)
     except Exception as e:
         print(f"警告：处理文件 {image_path} 时发生错误: {e}")
-        return None 
+        return None
+
+
+def _hash_from_pixels(pixels: list[np.ndarray | None], method: str) -> tuple[np.ndarray, np.ndarray]:
+    valid = np.array([p is not None for p in pixels], dtype=bool)
+    hashes = np.zeros(len(pixels), dtype=np.uint64)
+
+    if valid.any():
+        stack = np.stack([p for p in pixels if p is not None])
+        bits = np.packbits(_HASH_FUNCTIONS[method][1](stack), axis=1)
+        # 8 个字节按大端解释为一个 64 位整数，与 imagehash 的十六进制表示相同
+        hashes[valid] = bits.view('>u8').ravel()
+
+    return hashes, valid
+
+
+def batch_hash(image_paths: list[str], method: str = DEFAULT_HASH_METHOD) -> tuple[np.ndarray, np.ndarray]:
+    """
+    批量计算感知哈希，算法与 imagehash 中的同名算法（phash/average_hash/dhash）相同，
+    但解码时直接缩小为灰度图，哈希值可能与 imagehash 有个别比特的差异。
+    返回 (hashes, valid)：hashes 为 uint64 数组，valid 标记对应图片是否读取成功。
+
+    与前一张字节完全相同的图片直接沿用前一张的结果，不再解码。
+    本函数本身不开线程：并行由调用方的线程池/进程池按批次完成，各 worker 的读盘与解码自然错开。
+    """
+    pixels = []
+    last_data = None
+    for path in image_paths:
+        data = _read_file(path)
+        # bytes 比较先比长度再 memcmp，内容不同的帧通常在前几百字节就能分出
+        if data is not None and data == last_data:
+            pixels.append(pixels[-1])
+            continue
+        last_data = data
+        pixels.append(None if data is None else _load_hash_pixels(data, path, method))
+    return _hash_from_pixels(pixels, method)
+
+
+def compute_perceptual_hash(image_path: str, method: str = DEFAULT_HASH_METHOD) -> int | None:
+    """
+    计算单张图片的感知哈希，返回 64 位整数。
+    """
+    hashes, valid = batch_hash([image_path], method)
+    return int(hashes[0]) if valid[0] else None
+
+
+def _prefetch(func, items, depth: int = PREFETCH_DEPTH):
+    """
+    按输入顺序产出 func(item)，后台线程始终提前处理至多 depth 个元素，
+    让读取、解码与调用方的编码、写入重叠。
+    """
+    with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class Cancelled(Exception):
+    """cancel_event 被置位（如处理中关闭了窗口）时由各阶段抛出。"""
+
+
+def _check_cancel(cancel_event: threading.Event | None):
+    if cancel_event is not None and cancel_event.is_set():
+        raise Cancelled()
+
+
+def _iter_hash_batches(image_paths: list[str], method: str, cancel_event: threading.Event | None = None):
+    """
+    按顺序逐批产出 (hashes, valid)。图片多时用进程池并行，图片少时用线程池
+    （Pillow 解码时释放 GIL）。
+    """
+    use_processes = len(image_paths) >= PROCESS_POOL_MIN_IMAGES
+    if use_processes:
+        workers = os.cpu_count() or 1
+        if sys.platform == 'win32':
+            # Windows 上 ProcessPoolExecutor 最多只能开 61 个进程，超过会直接抛 ValueError
+            workers = min(workers, 61)
+    else:
+        workers = PREFETCH_WORKERS
+    # 图片不多时缩小批次，保证每个 worker 都能分到活；批次数少于 worker 数时也不多开进程
+    batch_size = max(1, min(HASH_BATCH_SIZE, -(-len(image_paths) // workers)))
+    batches = [image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)]
+    workers = max(1, min(workers, len(batches)))
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for result in executor.map(partial(batch_hash, method=method), batches):
+            _check_cancel(cancel_event)
+            yield result
+    finally:
+        # 提前结束（取消或出错）时丢弃尚未开始的批次；否则 shutdown 以及解释器退出时
+        # 都会等排队的批次全部算完
+        executor.shutdown(cancel_futures=True)
+
+
+def is_writable_dir(path: str) -> bool:
+    # 实际建一个临时文件来判断能否写入（Windows 上 os.access 对文件夹不可靠）
+    try:
+        with tempfile.TemporaryFile(dir=path):
+            return True
+    except OSError:
+        return False
+
+
+def _hash_cache_path(input_dir: str) -> str:
+    cache_path = os.path.join(input_dir, HASH_CACHE_FILENAME)
+    if os.path.exists(cache_path) or is_writable_dir(input_dir):
+        return cache_path
+    # 光盘、只读的网络共享等：缓存以绝对路径为键，多个文件夹可以共用临时目录中的同一个文件
+    return os.path.join(tempfile.gettempdir(), HASH_CACHE_FILENAME)
+
+
+def _load_hash_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # 哈希的计算方式变化后，旧缓存整体作废
+    if not isinstance(cache, dict) or cache.get('version') != HASH_CACHE_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def _save_hash_cache(cache_path: str, cache: dict):
+    # 先写临时文件再 os.replace，中途出错也不会留下损坏的缓存
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': HASH_CACHE_VERSION, 'files': cache}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"警告：无法写入哈希缓存 {cache_path}: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _compute_hashes(image_paths: list[str], method: str, progress_cb=None,
+                    cancel_event: threading.Event | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    计算全部图片的哈希，优先从缓存读取；只有未命中的图片才会被解码。
+    """
+    total_images = len(image_paths)
+    hashes = np.zeros(total_images, dtype=np.uint64)
+    valid = np.zeros(total_images, dtype=bool)
+
+    cache_path = _hash_cache_path(os.path.dirname(os.path.abspath(image_paths[0])))
+    cache = _load_hash_cache(cache_path)
+    keys = [os.path.abspath(path) for path in image_paths]
+    missing = []
+    for i, key in enumerate(keys):
+        try:
+            st = os.stat(key)
+        except OSError:
+            missing.append(i)
+            continue
+        record = cache.get(key)
+        if record is None or record.get('size') != st.st_size or record.get('mtime_ns') != st.st_mtime_ns:
+            # 文件是新的或已被修改：旧记录作废
+            cache[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        elif method in record:
+            hashes[i] = record[method]
+            valid[i] = True
+            continue
+        missing.append(i)
+    print(f"   缓存：{total_images - len(missing)} 张命中，{len(missing)} 张需要计算.")
+    if progress_cb is not None:
+        progress_cb(total_images - len(missing), total_images)
+
+    offset = 0
+    for batch_hashes, batch_valid in _iter_hash_batches([image_paths[i] for i in missing], method, cancel_event):
+        batch_indices = missing[offset:offset + len(batch_hashes)]
+        offset += len(batch_hashes)
+        hashes[batch_indices] = batch_hashes
+        valid[batch_indices] = batch_valid
+        for i, image_hash, ok in zip(batch_indices, batch_hashes.tolist(), batch_valid.tolist()):
+            if ok and keys[i] in cache:
+                cache[keys[i]][method] = image_hash
+        # 打印进度
+        sys.stdout.write(f"\r   进度: {offset} / {len(missing)} 张已计算哈希.")
+        sys.stdout.flush()
+        if progress_cb is not None:
+            progress_cb(total_images - len(missing) + offset, total_images)
+    if missing:
+        print()
+
+    # 顺带清理已被删除的文件；本次列出的图片刚刚 stat 过，不必再检查一遍
+    listed = set(keys)
+    stale_keys = [key for key in cache if key not in listed and not os.path.exists(key)]
+    for key in stale_keys:
+        del cache[key]
+    if missing or stale_keys:
+        _save_hash_cache(cache_path, cache)
+    return hashes, valid
+
+
+def _sweep(hashes: list[int], valid: list[bool], animation_threshold: int, new_slide_threshold: int) -> list[int]:
+    """
+    在哈希序列上执行双阈值判定，返回每一页“最终态”图片的下标。
+    哈希为 Python int，汉明距离用 int.bit_count（CPU 的 POPCNT 指令），上万帧也只需几十毫秒。
+    """
+    n = len(hashes)
+    selected = []
+    # 初始化：第一张图作为第一个“候选人”
+    candidate = 0
+
+    for i in range(1, n):
+        if not valid[i] or not valid[candidate]:
+            continue
 
+        # 计算当前图片与“候选人”之间的汉明距离
+        distance = (hashes[i] ^ hashes[candidate]).bit_count()
 
-def find_unique_slides(image_paths: list[str]) -> list[str]:
+        if distance > new_slide_threshold:
+            # 情况 A：换页了，保存上一页的最全形态，当前图成为新的候选人
+            selected.append(candidate)
+            candidate = i
+        elif distance > animation_threshold:
+            # 情况 B：同一页的动画叠加，只更新候选人
+            candidate = i
+        # 情况 C：重复帧，不做任何操作
+
+    # 最后留在手中的候选人必定是最后一页的最终形态
+    selected.append(candidate)
+    return selected
+
+
+def find_unique_slides(image_paths: list[str], method: str = DEFAULT_HASH_METHOD, progress_cb=None,
+                       cancel_event: threading.Event | None = None) -> list[str]:
     """
     核心逻辑升级：候选区替换策略 (Buffer Replacement Strategy)
     解决 1 -> 1,2 -> 1,2,3 的动画叠加问题
+
+    哈希计算彼此独立，先按批次并行算出全部哈希（顺序与输入一致），
+    再在主进程中顺序执行阈值判定。注意：多进程要求入口处有
+    `if __name__ == "__main__":` 保护（打包为 exe 时还需 freeze_support）。
+
+    progress_cb(done, total) 会在每批哈希算完后被调用，可能来自非主线程。
+    cancel_event 被置位后会在下一批算完时抛出 Cancelled，未开始的批次直接丢弃。
     """
     if not image_paths:
         return []
 
-    final_slides = []
-    
-    # 初始化：第一张图作为第一个“候选人”
-    candidate_path = image_paths[0]
-    candidate_hash = compute_perceptual_hash(candidate_path)
-    
-    total_images = len(image_paths)
-    print(f"   判定逻辑：双阈值过滤（动画阈值:{ANIMATION_THRESHOLD}, 换页阈值:{NEW_SLIDE_THRESHOLD}）")
-
-    for i in range(1, total_images):
-        current_path = image_paths[i]
-        current_hash = compute_perceptual_hash(current_path)
-        
-        if current_hash is None or candidate_hash is None:
-            continue
-        
-        # 计算当前图片与“候选人”之间的距离
-        distance = current_hash - candidate_hash
-        
-        if distance > NEW_SLIDE_THRESHOLD:
-            # --- 情况 A：距离很大，判定为【换页了】 ---
-            # 1. 把之前的候选人（即上一页的最全形态）存入结果
-            final_slides.append(candidate_path)
-            # 2. 把当前图设为新的候选人
-            candidate_path = current_path
-            candidate_hash = current_hash
-            
-        elif distance > ANIMATION_THRESHOLD:
-            # --- 情况 B：距离中等，判定为【同一页的动画叠加】 ---
-            # 这种情况下，1,2 覆盖 1， 1,2,3 覆盖 1,2
-            # 我们不保存到 final_slides，只是更新候选人，让它保持为“最新、最全”的状态
-            candidate_path = current_path
-            candidate_hash = current_hash
-            
-        # --- 情况 C：距离极小，判定为【重复帧】，不做任何操作，继续找下一张 ---
+    animation_threshold, new_slide_threshold = HASH_THRESHOLDS[method]
+    print(f"   判定逻辑：{method} 双阈值过滤（动画阈值:{animation_threshold}, 换页阈值:{new_slide_threshold}）")
 
-        # 打印进度
-        if (i + 1) % 50 == 0 or (i + 1) == total_images:
-            sys.stdout.write(f"\r   进度: {i + 1} / {total_images} 张已处理. 已捕获 {len(final_slides) + 1} 页 PPT.")
-            sys.stdout.flush()
+    hashes, valid = _compute_hashes(image_paths, method, progress_cb, cancel_event)
+    # 与前一张哈希完全相同的帧必然落入“重复帧”分支，对判定没有任何影响，
+    # 先整体向量化剔除，顺序扫描只需处理剩下的帧
+    keep = np.ones(len(hashes), dtype=bool)
+    keep[1:] = (hashes[1:] != hashes[:-1]) | ~valid[1:] | ~valid[:-1]
+    print(f"   预筛：跳过 {len(hashes) - int(keep.sum())} 张与前一张哈希相同的重复帧.")
+    image_paths = [path for path, k in zip(image_paths, keep.tolist()) if k]
+    # Python int 的位运算远快于 numpy 标量
+    hashes, valid = hashes[keep].tolist(), valid[keep].tolist()
 
-    # 循环结束后，最后留在手中的候选人必定是最后一页的最终形态，必须加入
-    final_slides.append(candidate_path)
+    final_slides = [image_paths[i] for i in _sweep(hashes, valid, animation_threshold, new_slide_threshold)]
     
-    print("\n   去重完成！")
+    print(f"   去重完成！已捕获 {len(final_slides)} 页 PPT.")
     return final_slides
 
 
-def create_pdf_from_images(image_paths: list[str], output_path: str):
-    if not image_paths:
-        return
+def _open_pdf_page(path: str) -> Image.Image:
+    # 截图本身就是 RGB JPEG 时无需 convert，省去一次整幅像素的拷贝
+    img = Image.open(path)
+    if img.mode == 'RGB':
+        # 在预读线程中完成解码（Pillow 解码时释放 GIL），而不是等到 save 时在主线程解码
+        img.load()
+        return img
+    with img:
+        return img.convert('RGB')
+
+
+# img2pdf 无法直接嵌入的图片（如 EXIF 方向值无效的 JPEG、不支持的色彩空间）会抛出这些异常，
+# 此时改用 Pillow。带透明通道的 PNG 由 img2pdf 自行生成 /SMask，不在此列
+_IMG2PDF_UNSUPPORTED = (
+    img2pdf.AlphaChannelError,
+    img2pdf.ImageOpenError,
+    img2pdf.JpegColorspaceError,
+    img2pdf.UnsupportedColorspaceError,
+    img2pdf.ExifOrientationError,
+)
 
+
+def _img2pdf_input(path: str) -> str | bytes:
+    # img2pdf 能直接嵌入的图片原样返回路径；否则只把这一张用 Pillow 转成 RGB 的 PNG 字节（无损）
     try:
-        img_objects = []
-        for path in image_paths:
-            img = Image.open(path).convert('RGB')
-            img_objects.append(img)
-            
-        if img_objects:
-            img_objects[0].save(
-                output_path, 
-                "PDF", 
-                resolution=100.0,
-                save_all=True, 
-                append_images=img_objects[1:]
-            )
-            
+        # read_images 只做 img2pdf 写 PDF 前的解析与检查（JPEG 只读文件头），不生成整份 PDF
+        with open(path, 'rb') as f:
+            for _ in img2pdf.read_images(f.read(), None):
+                pass
+        return path
+    except _IMG2PDF_UNSUPPORTED:
+        buf = io.BytesIO()
+        with _open_pdf_page(path) as img:
+            img.save(buf, 'PNG')
+        return buf.getvalue()
+
+
+def _write_with_img2pdf(inputs: list[str | bytes], output_path: str):
+    with open(output_path, 'wb') as f:
+        img2pdf.convert(
+            inputs,
+            layout_fun=img2pdf.get_fixed_dpi_layout_fun((PDF_RESOLUTION, PDF_RESOLUTION)),
+            outputstream=f
+        )
+
+
+def _create_pdf_with_pillow(image_paths: list[str], output_path: str, progress_cb=None,
+                            cancel_event: threading.Event | None = None):
+    """
+    分段生成 PDF：Pillow 会把 append_images 全部收集后才开始写入，
+    一次性传入所有页面会让每一页解码后的像素同时驻留内存。
+    这里每段写入 PDF_PAGES_PER_WRITE 页，后续段以 append 模式追加到同一文件。
+    页面由后台线程提前解码，与 Pillow 的编码、写入重叠。
+    """
+    pages = _prefetch(_open_pdf_page, image_paths)
+    for start in range(0, len(image_paths), PDF_PAGES_PER_WRITE):
+        _check_cancel(cancel_event)
+        img_objects = [next(pages) for _ in image_paths[start:start + PDF_PAGES_PER_WRITE]]
+        img_objects[0].save(
+            output_path, 
+            "PDF", 
+            resolution=PDF_RESOLUTION,
+            save_all=True, 
+            append_images=img_objects[1:],
+            append=start > 0
+        )
+        
         for img in img_objects:
             img.close()
-            
+        if progress_cb is not None:
+            progress_cb(start + len(img_objects), len(image_paths))
+
+
+def create_pdf_from_images(image_paths: list[str], output_path: str, progress_cb=None,
+                           cancel_event: threading.Event | None = None):
+    """
+    用 img2pdf 生成 PDF：JPEG 原始字节直接嵌入 PDF（/DCTDecode），
+    不解码也不重新编码，速度快、无二次压缩损失。img2pdf 不支持的图片单独转为 PNG 后再嵌入，
+    其余页面不受影响；仍然失败时整体回退到 Pillow。
+    progress_cb(已写页数, 总页数) 在写入完成（Pillow 回退时为每段写完）后调用。
+    cancel_event 被置位时抛出 Cancelled，并删除写了一半的 PDF。
+    """
+    if not image_paths:
+        return
+    _check_cancel(cancel_event)
+
+    try:
+        try:
+            _write_with_img2pdf(image_paths, output_path)
+        except _IMG2PDF_UNSUPPORTED as e:
+            print(f"\n提示：部分图片无法直接嵌入 PDF（{e}），只对这些图片重新编码.")
+            try:
+                _write_with_img2pdf([_img2pdf_input(path) for path in image_paths], output_path)
+            except _IMG2PDF_UNSUPPORTED as e:
+                print(f"\n提示：仍无法生成 PDF（{e}），改用 Pillow 重新编码全部页面.")
+                _create_pdf_with_pillow(image_paths, output_path, progress_cb, cancel_event)
+                return
+
+        if progress_cb is not None:
+            progress_cb(len(image_paths), len(image_paths))
+
+    except Cancelled:
+        # Pillow 分段写入途中取消：文件只有一部分页面，不能留下
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
     except Exception as e:
         print(f"\n致命错误：生成 PDF 时发生错误: {e}")
         raise
@@ -142,12 +556,13 @@ def extract_input_features(input_dir: str) -> str:
 
 
 class PPTDeduplicatorApp:
-    def __init__(self, master):
+    def __init__(self, master, hash_method: str = DEFAULT_HASH_METHOD):
         self.master = master
         master.title("🎓 智云课堂 PPT 深度去重版 (v1.2.0)")
         
         self.input_dir = ""
         self.output_dir = ""
+        self.hash_method = hash_method
 
         # UI 构建
         Label(master, text="输入文件夹 (原始截图):").grid(row=0, column=0, sticky=W, padx=10, pady=(10, 2))
@@ -165,8 +580,27 @@ class PPTDeduplicatorApp:
         self.run_button = Button(master, text="✨ 开始深度去重并生成 PDF ✨", command=self.run_deduplication, fg="white", bg="#209865", font=("微软雅黑", 10, "bold"))
         self.run_button.grid(row=5, column=0, columnspan=2, sticky=W+E, padx=10, pady=10)
 
+        self.progress_bar = Progressbar(master, orient='horizontal', mode='determinate')
+        self.progress_bar.grid(row=6, column=0, columnspan=2, sticky=W+E, padx=10, pady=(0, 5))
+
         self.status_label = Label(master, text="状态: 等待中...", fg="blue")
-        self.status_label.grid(row=6, column=0, columnspan=2, sticky=W, padx=10, pady=(5, 10))
+        self.status_label.grid(row=7, column=0, columnspan=2, sticky=W, padx=10, pady=(5, 10))
+
+        # 后台线程 -> 界面线程的消息队列
+        self.progress_q = queue.Queue()
+        self.running = False
+        self.worker = None
+        self.cancel_event = threading.Event()
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        # 关窗不会让进程立即退出：线程池/进程池在退出前会把排队的任务全部跑完，
+        # 后台线程还可能接着写 PDF。因此先通知后台线程取消，由 main() 等它收尾
+        if self.running:
+            if not messagebox.askokcancel("退出", "任务仍在进行中，确定要退出吗？"):
+                return
+            self.cancel_event.set()
+        self.master.destroy()
         
     def browse_input(self):
         folder = filedialog.askdirectory()
@@ -187,43 +621,124 @@ class PPTDeduplicatorApp:
         if not os.path.isdir(input_dir) or not os.path.isdir(output_dir):
             messagebox.showerror("错误", "请输入有效的路径。")
             return
+        # 先确认能写入，免得算完全部哈希才在生成 PDF 时失败
+        if not is_writable_dir(output_dir):
+            messagebox.showerror("错误", "输出目录不可写，请换一个目录。")
+            return
+
+        self.running = True
+        self.run_button.config(state="disabled", text="正在处理，请勿关闭...")
+        self.status_label.config(text="状态: 1/3 正在加载图片列表...", fg="black")
+        self.progress_bar.config(value=0)
+
+        # 耗时的处理放到后台线程，界面保持响应；进度通过队列传回主线程
+        self.worker = threading.Thread(target=self._pipeline, args=(input_dir, output_dir), daemon=True)
+        self.worker.start()
+        self.master.after(100, self._poll_progress)
+
+    def _pipeline(self, input_dir: str, output_dir: str):
+        # 运行在后台线程：Tk 控件不是线程安全的，这里只向队列发送消息
+        def report_progress(done, total):
+            self.progress_q.put(('progress', done, total))
 
         try:
-            self.run_button.config(state="disabled", text="正在处理，请勿关闭...")
-            self.status_label.config(text="状态: 1/3 正在加载图片列表...", fg="black")
-            self.master.update()
-            
             all_image_paths = get_image_files(input_dir)
             if not all_image_paths:
-                messagebox.showinfo("提示", "该文件夹内没有找到有效的图片文件。")
-                self.run_button.config(state="normal", text="✨ 开始深度去重并生成 PDF ✨")
+                self.progress_q.put(('empty',))
                 return
 
-            self.status_label.config(text=f"状态: 2/3 正在识别动画与翻页 (共{len(all_image_paths)}张)...")
-            self.master.update()
+            self.progress_q.put(('status', f"状态: 2/3 正在识别动画与翻页 (共{len(all_image_paths)}张)..."))
             
             # 调用新的去重逻辑
-            unique_paths = find_unique_slides(all_image_paths)
+            unique_paths = find_unique_slides(all_image_paths, self.hash_method, progress_cb=report_progress,
+                                              cancel_event=self.cancel_event)
 
-            self.status_label.config(text=f"状态: 3/3 正在生成 PDF (共 {len(unique_paths)} 页)...")
-            self.master.update()
+            self.progress_q.put(('status', f"状态: 3/3 正在生成 PDF (共 {len(unique_paths)} 页)..."))
             
             base_filename = extract_input_features(input_dir)
             output_pdf_path = os.path.join(output_dir, f"{base_filename}_FullContent.pdf")
-            create_pdf_from_images(unique_paths, output_pdf_path)
+            create_pdf_from_images(unique_paths, output_pdf_path, progress_cb=report_progress,
+                                   cancel_event=self.cancel_event)
 
-            self.status_label.config(text="状态: 🎉 任务成功完成！", fg="green")
-            messagebox.showinfo("成功", f"处理完成！\n已自动合并动画，共保留 {len(unique_paths)} 页。\n保存至: {output_pdf_path}")
+            self.progress_q.put(('done', len(unique_paths), output_pdf_path))
 
+        except Cancelled:
+            # 窗口已经关闭，无需再通知界面
+            pass
         except Exception as e:
-            self.status_label.config(text=f"状态: ❌ 出错了。", fg="red")
-            messagebox.showerror("运行错误", str(e))
-        finally:
-            self.run_button.config(state="normal", text="✨ 开始深度去重并生成 PDF ✨")
+            self.progress_q.put(('error', str(e)))
+
+    def _poll_progress(self):
+        while True:
+            try:
+                message = self.progress_q.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = message[0]
+            if kind == 'status':
+                self.status_label.config(text=message[1])
+            elif kind == 'progress':
+                self.progress_bar.config(maximum=max(message[2], 1), value=message[1])
+            elif kind == 'empty':
+                self._finish_run()
+                messagebox.showinfo("提示", "该文件夹内没有找到有效的图片文件。")
+                return
+            elif kind == 'done':
+                self._finish_run()
+                self.status_label.config(text="状态: 🎉 任务成功完成！", fg="green")
+                messagebox.showinfo("成功", f"处理完成！\n已自动合并动画，共保留 {message[1]} 页。\n保存至: {message[2]}")
+                return
+            elif kind == 'error':
+                self._finish_run()
+                self.status_label.config(text=f"状态: ❌ 出错了。", fg="red")
+                messagebox.showerror("运行错误", message[1])
+                return
+
+        self.master.after(100, self._poll_progress)
+
+    def _finish_run(self):
+        self.running = False
+        self.run_button.config(state="normal", text="✨ 开始深度去重并生成 PDF ✨")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="智云课堂 PPT 去重工具：不带路径参数时启动图形界面。")
+    parser.add_argument("input_dir", nargs="?", help="原始截图所在文件夹")
+    parser.add_argument("output_dir", nargs="?", help="PDF 输出目录（默认与输入文件夹相同）")
+    parser.add_argument("--hash", choices=list(HASH_THRESHOLDS), default=DEFAULT_HASH_METHOD,
+                        help=f"感知哈希算法（默认 {DEFAULT_HASH_METHOD}）；ahash/dhash 区分动画与换页的能力较弱")
+    args = parser.parse_args()
+
+    if args.input_dir is None:
+        root = Tk()
+        app = PPTDeduplicatorApp(root, hash_method=args.hash)
+        root.resizable(True, False) 
+        root.mainloop()
+        # 窗口关闭时若仍在处理，后台线程已收到取消：等它丢弃排队的批次、删掉写了一半的 PDF 后再退出
+        if app.worker is not None:
+            app.worker.join()
+        return
+
+    input_dir = args.input_dir
+    output_dir = args.output_dir or input_dir
+    if not os.path.isdir(input_dir) or not os.path.isdir(output_dir):
+        sys.exit("错误：请输入有效的路径。")
+    if not is_writable_dir(output_dir):
+        sys.exit("错误：输出目录不可写，请换一个目录。")
+
+    all_image_paths = get_image_files(input_dir)
+    if not all_image_paths:
+        sys.exit("提示：该文件夹内没有找到有效的图片文件。")
+
+    unique_paths = find_unique_slides(all_image_paths, args.hash)
+    base_filename = extract_input_features(input_dir)
+    output_pdf_path = os.path.join(output_dir, f"{base_filename}_FullContent.pdf")
+    create_pdf_from_images(unique_paths, output_pdf_path)
+    print(f"处理完成！共保留 {len(unique_paths)} 页，保存至: {output_pdf_path}")
 
 
 if __name__ == "__main__":
-    root = Tk()
-    app = PPTDeduplicatorApp(root)
-    root.resizable(True, False) 
-    root.mainloop()
\ No newline at end of file
+    # 打包为 exe 后，子进程需要 freeze_support 才不会重新启动 GUI
+    freeze_support()
+    main()